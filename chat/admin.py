@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Conversation, Message
+from .models import Conversation, Message, HourlyMetrics, DailyMetrics
 
 @admin.register(Conversation)
 class ConversationAdmin(admin.ModelAdmin):
@@ -11,4 +11,12 @@ class ConversationAdmin(admin.ModelAdmin):
 class MessageAdmin(admin.ModelAdmin):
     list_display = ('id', 'conversation', 'direction', 'content', 'timestamp')
     list_filter = ('direction', 'conversation')
-    search_fields = ('id', 'content')
\ No newline at end of file
+    search_fields = ('id', 'content')
+
+@admin.register(HourlyMetrics, DailyMetrics)
+class MetricsRollupAdmin(admin.ModelAdmin):
+    list_display = (
+        'bucket', 'messages_sent', 'messages_received',
+        'conversations_opened', 'conversations_closed', 'first_responses'
+    )
+    date_hierarchy = 'bucket'
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class ChatConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "chat"
+
+    def ready(self):
+        from .state import connect_signals
+        from .warmup import warm_up_on_ready
+        connect_signals()
+        warm_up_on_ready()
@@ -0,0 +1,109 @@
+from contextlib import contextmanager
+from django.conf import settings
+from io import BytesIO
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+# Helpers shared by bench_startup, bench_webhook and the startup tests. The
+# probes run in fresh interpreters against a throwaway SQLite file, never
+# against the developer's db.sqlite3. Only the standard library and
+# django.conf are imported here, so probe scripts can import this module
+# without paying for (or measuring) the rest of Django.
+
+
+@contextmanager
+def temporary_database(**env):
+    """
+    Yield the environment for subprocesses using a freshly migrated SQLite
+    file in a temporary directory. Extra variables are passed as keywords.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        environment = {
+            **os.environ,
+            'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'realmate_challenge.settings'),
+            'DJANGO_DB_NAME': os.path.join(directory, 'db.sqlite3'),
+            'DJANGO_WARMUP': 'off',
+            **env,
+        }
+        run_manage(environment, 'migrate', '-v0')
+        yield environment
+
+
+def run_manage(env, *args):
+    subprocess.run(
+        [sys.executable, 'manage.py', *args],
+        env=env, cwd=settings.BASE_DIR, check=True, capture_output=True
+    )
+
+
+def create_conversation(env):
+    """Create an OPEN conversation in the database of `env` and return its id."""
+    conversation_id = str(uuid.uuid4())
+    run_manage(
+        env, 'shell', '-c',
+        "from chat.models import Conversation; from datetime import datetime; "
+        f"Conversation.objects.create(id='{conversation_id}', created_at=datetime(2025, 2, 21))"
+    )
+    return conversation_id
+
+
+def start_script(env, script, *args, **kwargs):
+    """Start `script` in a fresh interpreter, from the project directory."""
+    return subprocess.Popen(
+        [sys.executable, '-c', script, *map(str, args)],
+        env=env, cwd=settings.BASE_DIR, text=True, **kwargs
+    )
+
+
+def run_script(env, script, *args):
+    """Run `script` in a fresh interpreter and return the JSON it printed last."""
+    output = subprocess.run(
+        [sys.executable, '-c', script, *map(str, args)],
+        env=env, cwd=settings.BASE_DIR, check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def new_message_body(conversation_id, direction='RECEIVED', content='Mensagem de carga'):
+    return json.dumps({
+        'type': 'NEW_MESSAGE',
+        'timestamp': '2025-02-21T10:20:42',
+        'data': {
+            'id': str(uuid.uuid4()),
+            'direction': direction,
+            'content': content,
+            'conversation_id': conversation_id,
+        },
+    }).encode()
+
+
+def wsgi_environ(method, path, body=b'', remote_addr='127.0.0.1'):
+    environ = {
+        'REQUEST_METHOD': method,
+        'PATH_INFO': path,
+        'QUERY_STRING': '',
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'HTTP_HOST': 'localhost',
+        'REMOTE_ADDR': remote_addr,
+        'wsgi.input': BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.url_scheme': 'http',
+    }
+    if body:
+        environ['CONTENT_TYPE'] = 'application/json'
+        environ['CONTENT_LENGTH'] = str(len(body))
+    return environ
+
+
+def call_wsgi(application, environ):
+    """Serve one request through `application`. Returns (status code, milliseconds)."""
+    statuses = []
+    started = time.perf_counter()
+    b''.join(application(environ, lambda status, headers: statuses.append(status)))
+    return int(statuses[0].split()[0]), (time.perf_counter() - started) * 1000
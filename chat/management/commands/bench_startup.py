@@ -0,0 +1,77 @@
+from django.core.management.base import BaseCommand, CommandError
+from chat.benchmark import create_conversation, run_script, temporary_database
+from statistics import median
+
+# Runs in a fresh interpreter so imports and template compilation are really
+# cold. Framework imports are timed apart from setup, which imports the WSGI
+# module exactly like a server would: django.setup(), ChatConfig.ready and
+# the query-based warm-up in warm_up_application.
+PROBE = """
+import json, sys, time
+
+started = time.perf_counter()
+import django.core.handlers.wsgi, django.db.models, django.template.loader  # noqa: E401
+import rest_framework.views  # noqa: F401
+imports_ms = (time.perf_counter() - started) * 1000
+
+started = time.perf_counter()
+from realmate_challenge.wsgi import application
+setup_ms = (time.perf_counter() - started) * 1000
+
+from chat.benchmark import call_wsgi, new_message_body, wsgi_environ
+
+method, path, conversation_id = sys.argv[1], sys.argv[2], sys.argv[3]
+
+def request():
+    body = new_message_body(conversation_id) if method == 'POST' else b''
+    return call_wsgi(application, wsgi_environ(method, path, body))
+
+first_status, first_ms = request()
+second_status, second_ms = request()
+print(json.dumps({
+    'imports_ms': imports_ms,
+    'setup_ms': setup_ms,
+    'first_ms': first_ms,
+    'second_ms': second_ms,
+    'statuses': [first_status, second_status],
+}))
+"""
+
+
+class Command(BaseCommand):
+    help = "Measure cold start: import and setup time and first-request latency, with and without warm-up"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5, help="Fresh processes per mode and request (default: 5)")
+        parser.add_argument('--path', default='/', help="Page requested after startup (default: /)")
+
+    def handle(self, *args, **options):
+        requests = [('GET', options['path']), ('POST', '/webhook/')]
+
+        with temporary_database() as env:
+            conversation_id = create_conversation(env)
+
+            self.stdout.write(
+                f"{'warm-up':<10}{'request':<20}{'imports':>12}{'setup':>12}{'1st request':>14}{'2nd request':>14}"
+            )
+            for mode in ['off', 'on']:
+                for method, path in requests:
+                    results = [
+                        self.probe({**env, 'DJANGO_WARMUP': mode}, method, path, conversation_id)
+                        for _ in range(options['runs'])
+                    ]
+                    self.stdout.write(
+                        f"{mode:<10}{f'{method} {path}':<20}"
+                        f"{median(r['imports_ms'] for r in results):>10.1f}ms"
+                        f"{median(r['setup_ms'] for r in results):>10.1f}ms"
+                        f"{median(r['first_ms'] for r in results):>12.1f}ms"
+                        f"{median(r['second_ms'] for r in results):>12.1f}ms"
+                    )
+
+    def probe(self, env, method, path, conversation_id):
+        result = run_script(env, PROBE, method, path, conversation_id)
+        # An error page is not a meaningful latency, so refuse to time it
+        failed = [status for status in result['statuses'] if not 200 <= status < 300]
+        if failed:
+            raise CommandError(f"{method} {path} responded {failed[0]}; nothing to measure")
+        return result
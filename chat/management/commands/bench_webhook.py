@@ -0,0 +1,96 @@
+from collections import Counter
+from django.core.management.base import BaseCommand
+from chat.benchmark import create_conversation, start_script, temporary_database
+import json
+import subprocess
+
+# Runs in each worker process: serves NEW_MESSAGE webhooks through the real
+# WSGI application from a pool of threads, all against the same SQLite file
+WORKER = """
+import json, sys
+from concurrent.futures import ThreadPoolExecutor
+from realmate_challenge.wsgi import application
+from chat.benchmark import call_wsgi, new_message_body, wsgi_environ
+
+conversation_id, requests, threads, worker = sys.argv[1], int(sys.argv[2]), int(sys.argv[3]), int(sys.argv[4])
+single_source = sys.argv[5] == 'single'
+
+def post(index):
+    # One source per request keeps the per-source rate limit out of the
+    # way; a single source exercises it instead
+    source = '10.0.0.1' if single_source else f'10.{worker}.{index // 256}.{index % 256}'
+    environ = wsgi_environ('POST', '/webhook/', new_message_body(conversation_id), remote_addr=source)
+    return call_wsgi(application, environ)
+
+print('ready', flush=True)
+sys.stdin.readline()
+with ThreadPoolExecutor(max_workers=threads) as pool:
+    print(json.dumps(list(pool.map(post, range(requests)))), flush=True)
+"""
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class Command(BaseCommand):
+    help = "Load test NEW_MESSAGE webhooks from several worker processes sharing one SQLite file"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=4, help="Worker processes (default: 4)")
+        parser.add_argument('--threads', type=int, default=16, help="Concurrent requests per process (default: 16)")
+        parser.add_argument('--requests', type=int, default=400, help="Requests per process (default: 400)")
+        parser.add_argument(
+            '--single-source',
+            action='store_true',
+            help="Send every request from the same address, so the per-source rate limit applies"
+        )
+        parser.add_argument('--json', action='store_true', help="Print the summary as JSON")
+
+    def handle(self, *args, **options):
+        with temporary_database() as env:
+            conversation_id = create_conversation(env)
+            results = self.run_workers(env, conversation_id, options)
+
+        statuses = Counter(code for code, _ in results)
+        latencies = [elapsed for _, elapsed in results]
+        summary = {
+            'requests': len(results),
+            'statuses': {str(code): count for code, count in sorted(statuses.items())},
+            'p50_ms': percentile(latencies, 0.50),
+            'p99_ms': percentile(latencies, 0.99),
+            'max_ms': max(latencies),
+        }
+
+        if options['json']:
+            self.stdout.write(json.dumps(summary))
+            return
+        self.stdout.write(f"requests: {summary['requests']}")
+        for code, count in summary['statuses'].items():
+            self.stdout.write(f"  {code}: {count}")
+        self.stdout.write(
+            f"latency p50={summary['p50_ms']:.1f}ms p99={summary['p99_ms']:.1f}ms max={summary['max_ms']:.1f}ms"
+        )
+
+    def run_workers(self, env, conversation_id, options):
+        workers = [
+            start_script(
+                env, WORKER, conversation_id, options['requests'], options['threads'], index,
+                'single' if options['single_source'] else 'spread',
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+            )
+            for index in range(options['processes'])
+        ]
+        # Start every worker's burst at the same time, once all have booted
+        for worker in workers:
+            worker.stdout.readline()
+        for worker in workers:
+            worker.stdin.write('go\n')
+            worker.stdin.flush()
+
+        results = []
+        for worker in workers:
+            output, _ = worker.communicate()
+            results.extend(json.loads(output.strip().splitlines()[-1]))
+        return results
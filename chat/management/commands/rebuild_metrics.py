@@ -0,0 +1,34 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+from chat import metrics
+
+
+class Command(BaseCommand):
+    help = "Recompute the hourly and daily metrics rollups for a time range"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', required=True, help="ISO 8601 start of the range")
+        parser.add_argument('--end', required=True, help="ISO 8601 end of the range (exclusive)")
+        parser.add_argument(
+            '--chunk-days',
+            type=int,
+            default=1,
+            help="Number of days recomputed per transaction (default: 1)"
+        )
+
+    def handle(self, *args, **options):
+        start = parse_datetime(options['start'])
+        end = parse_datetime(options['end'])
+        if not start or not end:
+            raise CommandError("Invalid --start/--end format. Use ISO 8601")
+        if start >= end:
+            raise CommandError("--start must be before --end")
+        if options['chunk_days'] < 1:
+            raise CommandError("--chunk-days must be at least 1")
+
+        chunk = timedelta(days=options['chunk_days'])
+        for chunk_start, chunk_end in metrics.rebuild(start, end, chunk):
+            self.stdout.write(f"Rebuilt {chunk_start:%Y-%m-%d %H:%M} -> {chunk_end:%Y-%m-%d %H:%M}")
+
+        self.stdout.write(self.style.SUCCESS("Metrics rollups rebuilt"))
@@ -0,0 +1,188 @@
+from datetime import timedelta
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncHour
+from .models import Conversation, Message, HourlyMetrics, DailyMetrics
+
+ROLLUP_MODELS = {
+    'hour': HourlyMetrics,
+    'day': DailyMetrics,
+}
+
+COUNTER_FIELDS = [
+    'messages_sent',
+    'messages_received',
+    'conversations_opened',
+    'conversations_closed',
+    'first_responses',
+    'first_response_seconds',
+]
+
+
+def truncate_to_hour(moment):
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def truncate_to_day(moment):
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _increment(moment, **deltas):
+    """Add `deltas` to the hourly and daily buckets containing `moment`."""
+    buckets = [
+        (HourlyMetrics, truncate_to_hour(moment)),
+        (DailyMetrics, truncate_to_day(moment)),
+    ]
+    updates = {field: F(field) + value for field, value in deltas.items()}
+    for model, bucket in buckets:
+        # One UPDATE in the common case; the row is only created for a new bucket
+        if model.objects.filter(bucket=bucket).update(**updates):
+            continue
+        try:
+            with transaction.atomic():
+                model.objects.create(bucket=bucket, **deltas)
+        except IntegrityError:
+            # Another request created the bucket first
+            model.objects.filter(bucket=bucket).update(**updates)
+
+
+def record_conversation_opened(timestamp):
+    _increment(timestamp, conversations_opened=1)
+
+
+def record_conversation_closed(timestamp):
+    _increment(timestamp, conversations_closed=1)
+
+
+def record_message(conversation, direction, timestamp):
+    if direction == Message.Direction.RECEIVED:
+        _increment(timestamp, messages_received=1)
+        return
+
+    deltas = {'messages_sent': 1}
+    if conversation.first_response_at is None or timestamp < conversation.first_response_at:
+        # Same definition as the backfill: the earliest SENT message is the
+        # first response, even when it is delivered after a later one. The
+        # INSERT before this already holds the write lock on SQLite, and
+        # select_for_update does the same elsewhere, so the read and the
+        # update below cannot interleave with another request's
+        previous = (
+            Conversation.objects.select_for_update()
+            .filter(id=conversation.id)
+            .values_list('first_response_at', flat=True)
+            .first()
+        )
+        if previous is None or timestamp < previous:
+            Conversation.objects.filter(id=conversation.id).update(first_response_at=timestamp)
+            if previous is not None:
+                # Move the response out of the bucket that counted the later message
+                _increment(
+                    previous,
+                    first_responses=-1,
+                    first_response_seconds=-_response_seconds(conversation.created_at, previous)
+                )
+            previous = timestamp
+            deltas['first_responses'] = 1
+            deltas['first_response_seconds'] = _response_seconds(conversation.created_at, timestamp)
+        conversation.first_response_at = previous
+    _increment(timestamp, **deltas)
+
+
+def _response_seconds(created_at, first_response_at):
+    return max((first_response_at - created_at).total_seconds(), 0)
+
+
+def _hourly_counters(start, end):
+    """Recompute the hourly counters for [start, end) from the source tables."""
+    counters = {}
+
+    def bucket_for(hour):
+        return counters.setdefault(hour, dict.fromkeys(COUNTER_FIELDS, 0))
+
+    messages = (
+        Message.objects.filter(timestamp__gte=start, timestamp__lt=end)
+        .annotate(hour=TruncHour('timestamp'))
+        .values('hour')
+        .order_by('hour')
+        .annotate(
+            sent=Count('id', filter=Q(direction=Message.Direction.SENT)),
+            received=Count('id', filter=Q(direction=Message.Direction.RECEIVED)),
+        )
+    )
+    for row in messages:
+        counters_for_hour = bucket_for(row['hour'])
+        counters_for_hour['messages_sent'] = row['sent']
+        counters_for_hour['messages_received'] = row['received']
+
+    for field, column in [
+        ('conversations_opened', 'created_at'),
+        ('conversations_closed', 'closed_at'),
+    ]:
+        rows = (
+            Conversation.objects.filter(**{f'{column}__gte': start, f'{column}__lt': end})
+            .annotate(hour=TruncHour(column))
+            .values('hour')
+            .order_by('hour')
+            .annotate(total=Count('id'))
+        )
+        for row in rows:
+            bucket_for(row['hour'])[field] = row['total']
+
+    responses = Conversation.objects.filter(
+        first_response_at__gte=start,
+        first_response_at__lt=end
+    ).order_by().values_list('created_at', 'first_response_at')
+    for created_at, first_response_at in responses.iterator():
+        counters_for_hour = bucket_for(truncate_to_hour(first_response_at))
+        counters_for_hour['first_responses'] += 1
+        counters_for_hour['first_response_seconds'] += _response_seconds(created_at, first_response_at)
+
+    return counters
+
+
+def rebuild(start, end, chunk=timedelta(days=1)):
+    """
+    Recompute the rollups between `start` and `end`, one chunk at a time.
+
+    The range is widened to whole days so daily buckets are never left
+    partially rebuilt. Yields the (chunk_start, chunk_end) pairs as they
+    are committed.
+    """
+    start = truncate_to_day(start)
+    if end != truncate_to_day(end):
+        end = truncate_to_day(end) + timedelta(days=1)
+    chunk = max(timedelta(days=chunk.days), timedelta(days=1))
+
+    chunk_start = start
+    while chunk_start < end:
+        chunk_end = min(chunk_start + chunk, end)
+
+        with transaction.atomic():
+            # Deleting first takes the write lock, so no webhook increment can
+            # commit between counting the source rows and replacing the buckets
+            for model in (HourlyMetrics, DailyMetrics):
+                model.objects.filter(bucket__gte=chunk_start, bucket__lt=chunk_end).delete()
+
+            counters = _hourly_counters(chunk_start, chunk_end)
+            daily = {}
+            for hour, values in counters.items():
+                day = daily.setdefault(truncate_to_day(hour), dict.fromkeys(COUNTER_FIELDS, 0))
+                for field, value in values.items():
+                    day[field] += value
+
+            for model, rows in [(HourlyMetrics, counters), (DailyMetrics, daily)]:
+                model.objects.bulk_create(
+                    [model(bucket=bucket, **values) for bucket, values in sorted(rows.items())]
+                )
+
+        yield chunk_start, chunk_end
+        chunk_start = chunk_end
+
+
+def summarize(granularity, start, end):
+    """Return the rollup rows for [start, end) and their totals."""
+    model = ROLLUP_MODELS[granularity]
+    rows = model.objects.filter(bucket__gte=start, bucket__lt=end)
+    totals = rows.aggregate(**{field: Sum(field) for field in COUNTER_FIELDS})
+    totals = {field: value or 0 for field, value in totals.items()}
+    return rows, totals
@@ -0,0 +1,281 @@
+from collections import OrderedDict
+from contextlib import contextmanager
+from django.conf import settings
+from django.db import OperationalError, connection
+from django.http import JsonResponse
+from django.urls import Resolver404, resolve
+import math
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ADMISSION = {
+    # Webhook requests allowed to run at the same time in this worker
+    'MAX_CONCURRENT': 4,
+    # Seconds a webhook may wait for a slot before being shed with 503
+    'MAX_QUEUE_WAIT': 0.5,
+    # Token bucket per source: sustained requests/second and burst size
+    'RATE': 50,
+    'BURST': 100,
+    # Number of sources whose buckets are remembered (least recently seen evicted)
+    'MAX_SOURCES': 10000,
+    # Header identifying the source; falls back to REMOTE_ADDR
+    'SOURCE_HEADER': None,
+    # URL names handled by the ingestion lane; everything else is priority
+    'INGESTION_URL_NAMES': ['webhook'],
+    # Concurrency of the priority lane (/health/, read endpoints, admin)
+    'PRIORITY_MAX_CONCURRENT': 16,
+    # Rejections are logged as one summary per interval (seconds), not per request
+    'LOG_INTERVAL': 10,
+}
+
+REJECTION_KINDS = ('rate_limited', 'shed', 'lock_timeout')
+
+# OperationalError messages meaning the database lock could not be taken in time
+LOCK_ERROR_MESSAGES = ('database is locked', 'database table is locked', 'lock timeout')
+
+# The middleware instance serving this process, read by the stats endpoint
+admission_controller = None
+
+
+def admission_stats():
+    if admission_controller is None:
+        return None
+    return admission_controller.stats()
+
+
+def is_lock_error(exception):
+    if not isinstance(exception, OperationalError):
+        return False
+    message = str(exception).lower()
+    return any(text in message for text in LOCK_ERROR_MESSAGES)
+
+
+@contextmanager
+def lock_wait(seconds):
+    """Bound how long this thread's SQLite connection waits on the write lock."""
+    if seconds is None or connection.vendor != 'sqlite':
+        yield
+        return
+
+    default = connection.settings_dict['OPTIONS'].get('timeout', 5)
+    with connection.cursor() as cursor:
+        cursor.execute(f'PRAGMA busy_timeout = {int(seconds * 1000)}')
+    try:
+        yield
+    finally:
+        if connection.connection is not None:
+            with connection.cursor() as cursor:
+                cursor.execute(f'PRAGMA busy_timeout = {int(default * 1000)}')
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def take(self):
+        """Consume a token. Returns 0 on success or the seconds until one is available."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+
+class Lane:
+    def __init__(self, name, max_concurrent, max_wait, lock_wait=None):
+        self.name = name
+        self.max_wait = max_wait
+        # Seconds a request may wait on the SQLite lock; None keeps the configured timeout
+        self.lock_wait = lock_wait
+        self.slots = threading.BoundedSemaphore(max_concurrent)
+        self.lock = threading.Lock()
+        self.admitted = 0
+        self.shed = 0
+        self.queue_time_total = 0.0
+        self.queue_time_max = 0.0
+
+    def acquire(self):
+        """Wait for a slot. Returns the seconds spent queueing, or None if shed."""
+        arrived = time.monotonic()
+        acquired = self.slots.acquire(timeout=self.max_wait)
+        waited = time.monotonic() - arrived
+        with self.lock:
+            if not acquired:
+                self.shed += 1
+                return None
+            self.admitted += 1
+            self.queue_time_total += waited
+            self.queue_time_max = max(self.queue_time_max, waited)
+        return waited
+
+    def release(self):
+        self.slots.release()
+
+    def stats(self):
+        with self.lock:
+            return {
+                'admitted': self.admitted,
+                'shed': self.shed,
+                'queue_time_avg': self.queue_time_total / self.admitted if self.admitted else 0.0,
+                'queue_time_max': self.queue_time_max,
+            }
+
+
+class AdmissionControlMiddleware:
+    """
+    Bounds how much webhook traffic a worker accepts at once.
+
+    Webhook requests go through a per-source token bucket (429 when empty)
+    and a bounded concurrency lane (503 when no slot frees up within
+    MAX_QUEUE_WAIT). Every other request uses a separate priority lane, so
+    an ingestion burst cannot starve /health/ or the read endpoints. An
+    admitted webhook also waits at most MAX_QUEUE_WAIT on the SQLite write
+    lock. Limits are per process; configure them through
+    settings.WEBHOOK_ADMISSION.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.config = {**DEFAULT_ADMISSION, **getattr(settings, 'WEBHOOK_ADMISSION', {})}
+        self.ingestion = Lane(
+            'ingestion',
+            self.config['MAX_CONCURRENT'],
+            self.config['MAX_QUEUE_WAIT'],
+            # Past this the webhook is shed with 503, see process_exception
+            lock_wait=self.config['MAX_QUEUE_WAIT']
+        )
+        self.priority = Lane(
+            'priority',
+            self.config['PRIORITY_MAX_CONCURRENT'],
+            self.config['MAX_QUEUE_WAIT']
+        )
+        self.buckets = OrderedDict()
+        self.buckets_lock = threading.Lock()
+        self.log_lock = threading.Lock()
+        self.rejected = dict.fromkeys(REJECTION_KINDS, 0)
+        self.pending_rejections = dict.fromkeys(REJECTION_KINDS, 0)
+        self.last_log = None
+
+        global admission_controller
+        admission_controller = self
+
+    def __call__(self, request):
+        if not self.is_ingestion(request):
+            return self.admit(self.priority, request)
+
+        retry_after = self.take_token(self.source(request))
+        if retry_after:
+            self.note_rejection('rate_limited')
+            return self.reject(
+                "Rate limit exceeded",
+                status=429,
+                retry_after=retry_after
+            )
+
+        return self.admit(self.ingestion, request)
+
+    def admit(self, lane, request):
+        waited = lane.acquire()
+        if waited is None:
+            self.note_rejection('shed')
+            return self.reject(
+                "Server overloaded, try again later",
+                status=503,
+                retry_after=lane.max_wait
+            )
+
+        try:
+            with lock_wait(lane.lock_wait):
+                response = self.get_response(request)
+        finally:
+            lane.release()
+
+        response['Server-Timing'] = f'queue;dur={waited * 1000:.1f}'
+        return response
+
+    def process_exception(self, request, exception):
+        # A webhook that timed out waiting for the SQLite lock is shed like
+        # one that timed out waiting for a slot, instead of failing with 500.
+        # Any other database error is a real failure and keeps its 500
+        if is_lock_error(exception) and self.is_ingestion(request):
+            self.note_rejection('lock_timeout')
+            return self.reject(
+                "Server overloaded, try again later",
+                status=503,
+                retry_after=self.ingestion.max_wait
+            )
+        return None
+
+    def is_ingestion(self, request):
+        if request.method != 'POST':
+            return False
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return False
+        return match.url_name in self.config['INGESTION_URL_NAMES']
+
+    def source(self, request):
+        header = self.config['SOURCE_HEADER']
+        if header and request.headers.get(header):
+            return request.headers[header]
+        return request.META.get('REMOTE_ADDR', '')
+
+    def take_token(self, source):
+        with self.buckets_lock:
+            bucket = self.buckets.pop(source, None)
+            if bucket is None:
+                bucket = TokenBucket(self.config['RATE'], self.config['BURST'])
+            self.buckets[source] = bucket
+            if len(self.buckets) > self.config['MAX_SOURCES']:
+                self.buckets.popitem(last=False)
+            return bucket.take()
+
+    def note_rejection(self, kind):
+        """Count a rejection and log a summary at most once per LOG_INTERVAL."""
+        now = time.monotonic()
+        with self.log_lock:
+            self.rejected[kind] += 1
+            self.pending_rejections[kind] += 1
+            if self.last_log is not None and now - self.last_log < self.config['LOG_INTERVAL']:
+                return
+            since = now - self.last_log if self.last_log is not None else 0.0
+            pending = self.pending_rejections
+            self.pending_rejections = dict.fromkeys(REJECTION_KINDS, 0)
+            self.last_log = now
+
+        ingestion = self.ingestion.stats()
+        logger.warning(
+            "Admission control rejected %d rate-limited, %d shed and %d lock-timeout requests "
+            "in the last %.0fs (ingestion queue time avg=%.1fms max=%.1fms)",
+            pending['rate_limited'],
+            pending['shed'],
+            pending['lock_timeout'],
+            since,
+            ingestion['queue_time_avg'] * 1000,
+            ingestion['queue_time_max'] * 1000
+        )
+
+    @staticmethod
+    def reject(message, status, retry_after):
+        response = JsonResponse({"error": message}, status=status)
+        response['Retry-After'] = str(max(1, math.ceil(retry_after)))
+        return response
+
+    def stats(self):
+        with self.log_lock:
+            rejected = dict(self.rejected)
+        return {
+            'rate_limited': rejected['rate_limited'],
+            'lock_timeouts': rejected['lock_timeout'],
+            'ingestion': self.ingestion.stats(),
+            'priority': self.priority.stats(),
+        }
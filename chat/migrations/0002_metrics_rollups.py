@@ -0,0 +1,84 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:42
+
+from django.db import migrations, models
+from django.db.models import F, Min, OuterRef, Subquery
+
+
+def backfill_conversation_timestamps(apps, schema_editor):
+    Conversation = apps.get_model('chat', 'Conversation')
+    Message = apps.get_model('chat', 'Message')
+
+    first_sent = (
+        Message.objects.filter(conversation=OuterRef('pk'), direction='SENT')
+        .values('conversation')
+        .annotate(first=Min('timestamp'))
+        .values('first')
+    )
+    Conversation.objects.update(first_response_at=Subquery(first_sent))
+    Conversation.objects.filter(status='CLOSED').update(closed_at=F('updated_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyMetrics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField(unique=True)),
+                ('messages_sent', models.PositiveIntegerField(default=0)),
+                ('messages_received', models.PositiveIntegerField(default=0)),
+                ('conversations_opened', models.PositiveIntegerField(default=0)),
+                ('conversations_closed', models.PositiveIntegerField(default=0)),
+                ('first_responses', models.PositiveIntegerField(default=0)),
+                ('first_response_seconds', models.FloatField(default=0)),
+            ],
+            options={
+                'ordering': ['bucket'],
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='HourlyMetrics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField(unique=True)),
+                ('messages_sent', models.PositiveIntegerField(default=0)),
+                ('messages_received', models.PositiveIntegerField(default=0)),
+                ('conversations_opened', models.PositiveIntegerField(default=0)),
+                ('conversations_closed', models.PositiveIntegerField(default=0)),
+                ('first_responses', models.PositiveIntegerField(default=0)),
+                ('first_response_seconds', models.FloatField(default=0)),
+            ],
+            options={
+                'ordering': ['bucket'],
+                'abstract': False,
+            },
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='closed_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='first_response_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        # Let rebuild_metrics read only the rows of the chunk it recomputes
+        migrations.AlterField(
+            model_name='conversation',
+            name='created_at',
+            field=models.DateTimeField(db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='message',
+            name='timestamp',
+            field=models.DateTimeField(db_index=True),
+        ),
+        migrations.RunPython(backfill_conversation_timestamps, migrations.RunPython.noop),
+    ]
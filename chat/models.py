@@ -13,8 +13,10 @@ class Conversation(models.Model):
         choices=Status.choices,
         default=Status.OPEN
     )
-    created_at = models.DateTimeField()
+    created_at = models.DateTimeField(db_index=True)
     updated_at = models.DateTimeField(auto_now=True)
+    first_response_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    closed_at = models.DateTimeField(null=True, blank=True, db_index=True)
 
     def __str__(self):
         return f"Conversation {self.id} - {self.status}"
@@ -39,10 +41,37 @@ class Message(models.Model):
         choices=Direction.choices
     )
     content = models.TextField()
-    timestamp = models.DateTimeField()
+    timestamp = models.DateTimeField(db_index=True)
 
     def __str__(self):
         return f"{self.direction} - {self.content[:20]}"
 
     class Meta:
-        ordering = ['timestamp']
\ No newline at end of file
+        ordering = ['timestamp']
+        indexes = [
+            models.Index(fields=['conversation', 'timestamp', 'id'], name='message_conv_keyset_idx'),
+        ]
+
+
+class MetricsRollup(models.Model):
+    bucket = models.DateTimeField(unique=True)
+    messages_sent = models.PositiveIntegerField(default=0)
+    messages_received = models.PositiveIntegerField(default=0)
+    conversations_opened = models.PositiveIntegerField(default=0)
+    conversations_closed = models.PositiveIntegerField(default=0)
+    first_responses = models.PositiveIntegerField(default=0)
+    first_response_seconds = models.FloatField(default=0)
+
+    class Meta:
+        abstract = True
+        ordering = ['bucket']
+
+
+class HourlyMetrics(MetricsRollup):
+    def __str__(self):
+        return f"Hourly metrics {self.bucket:%Y-%m-%d %H:00}"
+
+
+class DailyMetrics(MetricsRollup):
+    def __str__(self):
+        return f"Daily metrics {self.bucket:%Y-%m-%d}"
@@ -12,4 +12,29 @@ class ConversationSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Conversation
-        fields = ['id', 'status', 'messages', 'created_at', 'updated_at']
\ No newline at end of file
+        fields = ['id', 'status', 'messages', 'created_at', 'updated_at']
+
+class MetricsRollupSerializer(serializers.Serializer):
+    bucket = serializers.DateTimeField(required=False)
+    messages_sent = serializers.IntegerField()
+    messages_received = serializers.IntegerField()
+    sent_received_ratio = serializers.SerializerMethodField()
+    conversations_opened = serializers.IntegerField()
+    conversations_closed = serializers.IntegerField()
+    first_responses = serializers.IntegerField()
+    avg_first_response_seconds = serializers.SerializerMethodField()
+
+    def _value(self, obj, field):
+        return obj[field] if isinstance(obj, dict) else getattr(obj, field)
+
+    def get_sent_received_ratio(self, obj):
+        received = self._value(obj, 'messages_received')
+        if not received:
+            return None
+        return round(self._value(obj, 'messages_sent') / received, 4)
+
+    def get_avg_first_response_seconds(self, obj):
+        responses = self._value(obj, 'first_responses')
+        if not responses:
+            return None
+        return round(self._value(obj, 'first_response_seconds') / responses, 3)
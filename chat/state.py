@@ -0,0 +1,170 @@
+from collections import OrderedDict
+from django.conf import settings
+from django.db import DatabaseError, connection
+from django.db.models.signals import post_delete, post_save
+from .models import Conversation, Message
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ConversationState:
+    """What the webhook handlers need to know about a conversation."""
+
+    __slots__ = ('id', 'status', 'created_at', 'first_response_at')
+
+    def __init__(self, id, status, created_at, first_response_at=None):
+        self.id = id
+        self.status = status
+        self.created_at = created_at
+        self.first_response_at = first_response_at
+
+    @property
+    def is_closed(self):
+        return self.status == Conversation.Status.CLOSED
+
+
+class ConversationStateIndex:
+    """
+    Bounded LRU index of conversation existence and status for this process.
+
+    Only conversations known to exist are stored, so a miss always falls
+    back to the database. The index is an optimization, not the source of
+    truth: message inserts are guarded in SQL (see `insert_message`), so a
+    conversation closed by another worker is detected at write time and
+    the stale entry is refreshed.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, conversation_id):
+        with self.lock:
+            state = self.entries.get(conversation_id)
+            if state is not None:
+                self.entries.move_to_end(conversation_id)
+            return state
+
+    def put(self, state):
+        with self.lock:
+            self.entries[state.id] = state
+            self.entries.move_to_end(state.id)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+        return state
+
+    def discard(self, conversation_id):
+        with self.lock:
+            self.entries.pop(conversation_id, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def load(self, conversation_id):
+        """Return the state of a conversation, reading the database on a miss."""
+        state = self.get(conversation_id)
+        if state is None:
+            state = self.refresh(conversation_id)
+        return state
+
+    def refresh(self, conversation_id):
+        """Re-read a conversation from the database. Returns None if it does not exist."""
+        row = (
+            Conversation.objects.filter(id=conversation_id)
+            .values_list('status', 'created_at', 'first_response_at')
+            .first()
+        )
+        if row is None:
+            self.discard(conversation_id)
+            return None
+        return self.put(ConversationState(conversation_id, *row))
+
+    def warm(self):
+        """
+        Preload the most recently updated OPEN conversations.
+
+        CLOSED is final, so closed conversations are safe to load on a miss.
+        """
+        rows = (
+            Conversation.objects.filter(status=Conversation.Status.OPEN)
+            .order_by('-updated_at')
+            .values_list('id', 'status', 'created_at', 'first_response_at')[:self.max_size]
+        )
+        states = [ConversationState(*row) for row in rows]
+        for state in reversed(states):
+            self.put(state)
+        logger.info("Conversation state index warmed with %d conversations", len(states))
+
+
+conversation_states = ConversationStateIndex(
+    getattr(settings, 'CONVERSATION_STATE_INDEX_SIZE', 100000)
+)
+
+
+def sync_conversation_state(sender, instance, **kwargs):
+    conversation_states.put(ConversationState(
+        instance.id, instance.status, instance.created_at, instance.first_response_at
+    ))
+
+
+def discard_conversation_state(sender, instance, **kwargs):
+    conversation_states.discard(instance.id)
+
+
+def warm_conversation_states():
+    """Warm the index from process startup code, never from a request."""
+    try:
+        conversation_states.warm()
+    except DatabaseError:
+        logger.exception("Could not warm the conversation state index")
+
+
+def connect_signals():
+    post_save.connect(sync_conversation_state, sender=Conversation, dispatch_uid='chat.state.sync')
+    post_delete.connect(discard_conversation_state, sender=Conversation, dispatch_uid='chat.state.discard')
+
+
+def insert_message(id, conversation_id, direction, content, timestamp):
+    """
+    Insert a message only if its conversation exists and is still OPEN.
+
+    Runs as a single INSERT ... SELECT ... WHERE EXISTS statement, so the
+    check and the write cannot be separated by a concurrent close. Returns
+    True if the message was inserted.
+    """
+    fields = {field.attname: field for field in Message._meta.concrete_fields}
+    values = {
+        'id': id,
+        'conversation_id': conversation_id,
+        'direction': direction,
+        'content': content,
+        'timestamp': timestamp,
+    }
+    columns = ', '.join(connection.ops.quote_name(fields[name].column) for name in values)
+    placeholders = ', '.join(['%s'] * len(values))
+    params = [fields[name].get_db_prep_value(value, connection) for name, value in values.items()]
+
+    conversation_pk = Conversation._meta.pk
+    status_column = Conversation._meta.get_field('status').column
+    sql = (
+        f"INSERT INTO {connection.ops.quote_name(Message._meta.db_table)} ({columns}) "
+        f"SELECT {placeholders} WHERE EXISTS ("
+        f"SELECT 1 FROM {connection.ops.quote_name(Conversation._meta.db_table)} "
+        f"WHERE {connection.ops.quote_name(conversation_pk.column)} = %s "
+        f"AND {connection.ops.quote_name(status_column)} = %s)"
+    )
+    params += [
+        conversation_pk.get_db_prep_value(conversation_id, connection),
+        Conversation.Status.OPEN,
+    ]
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount == 1
@@ -1,10 +1,29 @@
-from django.test import TestCase
+from django.test import SimpleTestCase, TestCase
 from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.db import OperationalError, connection
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+import json
+import os
+import threading
+import time
 import uuid
-from datetime import datetime
-from .models import Conversation, Message
+from unittest import skipUnless
+from datetime import datetime, timedelta
+from .models import Conversation, Message, HourlyMetrics, DailyMetrics
+from .middleware import AdmissionControlMiddleware
+from .views_front import MESSAGE_PAGE_SIZE
+from .state import ConversationState, ConversationStateIndex, conversation_states
+from .warmup import warm_up_on_ready
+from .benchmark import create_conversation, run_script, temporary_database
 
 
 class WebhookTests(TestCase):
@@ -195,4 +214,565 @@ class WebhookTests(TestCase):
         }
 
         response = self.client.post(self.webhook_url, data, format='json')
-        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
\ No newline at end of file
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.webhook_url = reverse('webhook')
+        self.metrics_url = reverse('api-metrics')
+        self.conversation_id = uuid.uuid4()
+
+    def post_event(self, event_type, timestamp, data):
+        return self.client.post(
+            self.webhook_url,
+            {"type": event_type, "timestamp": timestamp, "data": data},
+            format='json'
+        )
+
+    def post_message(self, direction, timestamp):
+        return self.post_event("NEW_MESSAGE", timestamp, {
+            "id": str(uuid.uuid4()),
+            "direction": direction,
+            "content": "Mensagem",
+            "conversation_id": str(self.conversation_id)
+        })
+
+    def simulate_conversation(self):
+        self.post_event("NEW_CONVERSATION", "2025-02-21T10:20:00", {"id": str(self.conversation_id)})
+        self.post_message("RECEIVED", "2025-02-21T10:20:30")
+        self.post_message("SENT", "2025-02-21T10:21:00")
+        self.post_message("SENT", "2025-02-21T11:05:00")
+        self.post_event("CLOSE_CONVERSATION", "2025-02-21T11:10:00", {"id": str(self.conversation_id)})
+
+    # Teste 1: Webhooks mantêm os rollups por hora e por dia
+    def test_webhooks_update_rollups(self):
+        self.simulate_conversation()
+
+        ten = HourlyMetrics.objects.get(bucket=datetime(2025, 2, 21, 10))
+        self.assertEqual(ten.messages_received, 1)
+        self.assertEqual(ten.messages_sent, 1)
+        self.assertEqual(ten.conversations_opened, 1)
+        self.assertEqual(ten.first_responses, 1)
+        self.assertEqual(ten.first_response_seconds, 60)
+
+        eleven = HourlyMetrics.objects.get(bucket=datetime(2025, 2, 21, 11))
+        self.assertEqual(eleven.messages_sent, 1)
+        self.assertEqual(eleven.first_responses, 0)
+        self.assertEqual(eleven.conversations_closed, 1)
+
+        day = DailyMetrics.objects.get(bucket=datetime(2025, 2, 21))
+        self.assertEqual(day.messages_sent, 2)
+        self.assertEqual(day.messages_received, 1)
+        self.assertEqual(day.conversations_closed, 1)
+
+    # Teste 2: API de leitura com totais e métricas derivadas
+    def test_metrics_endpoint(self):
+        self.simulate_conversation()
+
+        response = self.client.get(self.metrics_url, {
+            "granularity": "hour",
+            "start": "2025-02-21T00:00:00",
+            "end": "2025-02-22T00:00:00"
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['buckets']), 2)
+        self.assertEqual(response.data['totals']['messages_sent'], 2)
+        self.assertEqual(response.data['totals']['sent_received_ratio'], 2)
+        self.assertEqual(response.data['totals']['avg_first_response_seconds'], 60)
+
+    # Teste 3: Limites com fuso horário são convertidos para o horário armazenado
+    def test_metrics_endpoint_aware_bounds(self):
+        self.simulate_conversation()
+
+        response = self.client.get(self.metrics_url, {
+            "granularity": "hour",
+            "start": "2025-02-21T00:00:00Z",
+            "end": "2025-02-21T08:00:00-03:00"
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['buckets']), 1)
+
+    # Teste 4: Granularidade inválida
+    def test_metrics_invalid_granularity(self):
+        response = self.client.get(self.metrics_url, {"granularity": "week"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    # Teste 5: Rebuild recalcula os rollups a partir das tabelas de origem
+    def test_rebuild_metrics_command(self):
+        self.simulate_conversation()
+        expected = list(HourlyMetrics.objects.values())
+        HourlyMetrics.objects.update(messages_sent=0)
+        DailyMetrics.objects.all().delete()
+
+        call_command(
+            'rebuild_metrics',
+            start="2025-02-20T00:00:00",
+            end="2025-02-22T12:00:00",
+            stdout=StringIO()
+        )
+
+        rebuilt = list(HourlyMetrics.objects.values())
+        for row in expected + rebuilt:
+            row.pop('id')
+        self.assertEqual(rebuilt, expected)
+        self.assertEqual(DailyMetrics.objects.get(bucket=datetime(2025, 2, 21)).messages_sent, 2)
+
+    # Teste 6: Bucket existente custa um único UPDATE por tabela de rollup
+    def test_increment_existing_bucket(self):
+        self.post_event("NEW_CONVERSATION", "2025-02-21T10:20:00", {"id": str(self.conversation_id)})
+        self.post_message("RECEIVED", "2025-02-21T10:20:30")
+
+        with CaptureQueriesContext(connection) as queries:
+            self.post_message("RECEIVED", "2025-02-21T10:30:00")
+
+        rollup_queries = [
+            query['sql'] for query in queries.captured_queries
+            if 'metrics"' in query['sql']
+        ]
+        self.assertEqual(len(rollup_queries), 2)
+        self.assertTrue(all(sql.startswith('UPDATE') for sql in rollup_queries))
+        self.assertEqual(
+            HourlyMetrics.objects.get(bucket=datetime(2025, 2, 21, 10)).messages_received, 2
+        )
+
+    # Teste 7: Resposta anterior entregue fora de ordem vira a primeira resposta
+    def test_out_of_order_first_response(self):
+        self.post_event("NEW_CONVERSATION", "2025-02-21T10:20:00", {"id": str(self.conversation_id)})
+        self.post_message("SENT", "2025-02-21T11:05:00")
+        self.post_message("SENT", "2025-02-21T10:21:00")
+
+        conversation = Conversation.objects.get(id=self.conversation_id)
+        self.assertEqual(conversation.first_response_at, datetime(2025, 2, 21, 10, 21))
+
+        ten = HourlyMetrics.objects.get(bucket=datetime(2025, 2, 21, 10))
+        eleven = HourlyMetrics.objects.get(bucket=datetime(2025, 2, 21, 11))
+        self.assertEqual((ten.first_responses, ten.first_response_seconds), (1, 60))
+        self.assertEqual((eleven.first_responses, eleven.first_response_seconds), (0, 0))
+        day = DailyMetrics.objects.get(bucket=datetime(2025, 2, 21))
+        self.assertEqual((day.first_responses, day.first_response_seconds), (1, 60))
+
+        # O rebuild chega aos mesmos valores
+        expected = list(HourlyMetrics.objects.order_by('bucket').values())
+        call_command(
+            'rebuild_metrics',
+            start="2025-02-21T00:00:00",
+            end="2025-02-22T00:00:00",
+            stdout=StringIO()
+        )
+        rebuilt = list(HourlyMetrics.objects.order_by('bucket').values())
+        for row in expected + rebuilt:
+            row.pop('id')
+        self.assertEqual(rebuilt, expected)
+
+
+class AdmissionControlTests(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def build_middleware(self, get_response, **config):
+        with override_settings(WEBHOOK_ADMISSION=config):
+            return AdmissionControlMiddleware(get_response)
+
+    def webhook_request(self, source='10.0.0.1'):
+        return self.factory.post(reverse('webhook'), {}, REMOTE_ADDR=source)
+
+    # Teste 1: Token bucket por origem responde 429 com Retry-After
+    def test_rate_limit_per_source(self):
+        middleware = self.build_middleware(
+            lambda request: HttpResponse("OK"),
+            RATE=1, BURST=2
+        )
+
+        self.assertEqual(middleware(self.webhook_request()).status_code, 200)
+        self.assertEqual(middleware(self.webhook_request()).status_code, 200)
+        with self.assertLogs('chat.middleware', 'WARNING'):
+            response = middleware(self.webhook_request())
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '1')
+
+        # Outra origem tem seu próprio bucket
+        self.assertEqual(middleware(self.webhook_request('10.0.0.2')).status_code, 200)
+
+    # Teste 2: Carga acima da capacidade é descartada com 503 e latência limitada (middleware isolado)
+    def test_overload_sheds_with_bounded_latency(self):
+        service_time = 0.05
+        max_queue_wait = 0.1
+
+        def slow_view(request):
+            time.sleep(service_time)
+            return HttpResponse("OK")
+
+        middleware = self.build_middleware(
+            slow_view,
+            MAX_CONCURRENT=2, MAX_QUEUE_WAIT=max_queue_wait, RATE=10000, BURST=10000
+        )
+
+        def timed_request(_):
+            started = time.monotonic()
+            response = middleware(self.webhook_request())
+            return response.status_code, time.monotonic() - started
+
+        with self.assertLogs('chat.middleware', 'WARNING'):
+            with ThreadPoolExecutor(max_workers=32) as pool:
+                results = list(pool.map(timed_request, range(200)))
+
+        statuses = [code for code, _ in results]
+        latencies = sorted(latency for _, latency in results)
+        p99 = latencies[int(len(latencies) * 0.99) - 1]
+
+        self.assertIn(503, statuses)
+        self.assertIn(200, statuses)
+        self.assertLess(p99, max_queue_wait + service_time + 0.25)
+        self.assertGreater(middleware.stats()['ingestion']['shed'], 0)
+
+    # Teste 3: /health/ não é afetado quando a ingestão está saturada
+    def test_priority_lane_not_starved(self):
+        release = threading.Event()
+
+        def view(request):
+            if request.path == reverse('webhook'):
+                release.wait(5)
+            return HttpResponse("OK")
+
+        middleware = self.build_middleware(view, MAX_CONCURRENT=1, MAX_QUEUE_WAIT=0.05)
+
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            blocked = pool.submit(middleware, self.webhook_request())
+            time.sleep(0.05)
+
+            with self.assertLogs('chat.middleware', 'WARNING'):
+                self.assertEqual(middleware(self.webhook_request()).status_code, 503)
+            health = middleware(self.factory.get(reverse('health')))
+            self.assertEqual(health.status_code, 200)
+            self.assertIn('Server-Timing', health)
+
+            release.set()
+            self.assertEqual(blocked.result().status_code, 200)
+
+    # Teste 4: Rejeições geram um resumo por intervalo, não um log por requisição
+    def test_rejections_logged_as_summary(self):
+        middleware = self.build_middleware(
+            lambda request: HttpResponse("OK"),
+            RATE=0.001, BURST=1, LOG_INTERVAL=60
+        )
+        middleware(self.webhook_request())
+
+        with self.assertLogs('chat.middleware', 'WARNING') as logs:
+            for _ in range(50):
+                self.assertEqual(middleware(self.webhook_request()).status_code, 429)
+
+        self.assertEqual(len(logs.records), 1)
+        self.assertEqual(middleware.stats()['rate_limited'], 50)
+
+    # Teste 5: Timeout no lock do SQLite vira 503 em vez de 500
+    def test_lock_timeout_is_shed(self):
+        middleware = self.build_middleware(lambda request: HttpResponse("OK"))
+
+        with self.assertLogs('chat.middleware', 'WARNING'):
+            response = middleware.process_exception(
+                self.webhook_request(), OperationalError("database is locked")
+            )
+
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(middleware.stats()['lock_timeouts'], 1)
+        self.assertIsNone(
+            middleware.process_exception(
+                self.factory.get(reverse('health')), OperationalError("database is locked")
+            )
+        )
+        # Outros erros de banco seguem para o tratamento padrão (500)
+        self.assertIsNone(
+            middleware.process_exception(self.webhook_request(), OperationalError("no such table: chat_message"))
+        )
+        self.assertEqual(middleware.stats()['lock_timeouts'], 1)
+
+    # Teste 6: Só o webhook usa a espera curta pelo lock do SQLite
+    def test_webhook_lock_wait(self):
+        def busy_timeout(request):
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA busy_timeout')
+                return HttpResponse(str(cursor.fetchone()[0]))
+
+        middleware = self.build_middleware(busy_timeout, MAX_QUEUE_WAIT=0.25)
+        default = settings.DATABASES['default']['OPTIONS']['timeout'] * 1000
+
+        self.assertEqual(int(middleware(self.webhook_request()).content), 250)
+        self.assertEqual(int(middleware(self.factory.get(reverse('health'))).content), default)
+        # O timeout padrão volta depois do webhook
+        self.assertEqual(int(busy_timeout(None).content), default)
+
+    # Teste 7: Estatísticas expostas em um endpoint de leitura
+    def test_admission_stats_endpoint(self):
+        self.client.get(reverse('health'))
+        response = self.client.get(reverse('api-admission-stats'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('queue_time_max', response.json()['ingestion'])
+        self.assertGreaterEqual(response.json()['priority']['admitted'], 1)
+
+
+@skipUnless(os.environ.get('CHAT_LOAD_TESTS'), "Set CHAT_LOAD_TESTS=1 to run the multi-process load tests")
+class WebhookLoadTests(SimpleTestCase):
+    def run_bench(self, **options):
+        output = StringIO()
+        call_command('bench_webhook', json=True, stdout=output, **options)
+        return json.loads(output.getvalue())
+
+    # Teste 1: Carga real de NEW_MESSAGE em vários processos contra o mesmo SQLite
+    def test_webhook_load_tail_latency(self):
+        summary = self.run_bench(processes=3, threads=8, requests=100)
+
+        self.assertEqual(summary['requests'], 300)
+        self.assertIn('201', summary['statuses'])
+        self.assertLessEqual(set(summary['statuses']), {'201', '429', '503'})
+        # Fila de admissão + espera pelo lock do SQLite, com folga para o ambiente de teste
+        admission = settings.WEBHOOK_ADMISSION['MAX_QUEUE_WAIT']
+        self.assertLess(summary['p99_ms'], (2 * admission + 1) * 1000)
+
+    # Teste 2: Uma única origem esgota o token bucket e recebe 429
+    def test_webhook_load_single_source(self):
+        burst = settings.WEBHOOK_ADMISSION['BURST']
+        summary = self.run_bench(processes=2, threads=8, requests=burst * 4, single_source=True)
+
+        self.assertEqual(summary['requests'], burst * 8)
+        self.assertIn('201', summary['statuses'])
+        self.assertIn('429', summary['statuses'])
+        self.assertLessEqual(set(summary['statuses']), {'201', '429', '503'})
+
+
+class ConversationPageTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.conversation = Conversation.objects.create(
+            id=uuid.uuid4(),
+            status=Conversation.Status.OPEN,
+            created_at=datetime.fromisoformat("2025-02-21T10:00:00")
+        )
+        start = datetime.fromisoformat("2025-02-21T10:00:00")
+        Message.objects.bulk_create([
+            Message(
+                id=uuid.uuid4(),
+                conversation=self.conversation,
+                direction=Message.Direction.RECEIVED,
+                content=f"Mensagem {i}",
+                timestamp=start + timedelta(seconds=i)
+            )
+            for i in range(MESSAGE_PAGE_SIZE + 10)
+        ])
+        self.detail_url = reverse('conversation-detail', kwargs={'id': self.conversation.id})
+        self.fragment_url = reverse('conversation-messages', kwargs={'id': self.conversation.id})
+
+    # Teste 1: Página inicial renderiza apenas as mensagens mais recentes
+    def test_detail_renders_latest_page(self):
+        response = self.client.get(self.detail_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertContains(response, f"Mensagem {MESSAGE_PAGE_SIZE + 9}<")
+        self.assertContains(response, "Mensagem 10<")
+        self.assertNotContains(response, "Mensagem 9<")
+        self.assertContains(response, self.fragment_url)
+
+    # Teste 2: Fragmento com cursor carrega as mensagens anteriores
+    def test_fragment_keyset_pagination(self):
+        cursor = Message.objects.get(content="Mensagem 10")
+        response = self.client.get(self.fragment_url, {
+            "before": cursor.timestamp.isoformat(),
+            "before_id": str(cursor.id)
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertContains(response, "Mensagem 0<")
+        self.assertContains(response, "Mensagem 9<")
+        self.assertNotContains(response, "Mensagem 10<")
+        self.assertNotContains(response, "older-messages")
+
+    # Teste 3: Cursor inválido
+    def test_fragment_invalid_cursor(self):
+        response = self.client.get(self.fragment_url, {"before": "ontem", "before_id": "x"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    # Teste 4: Fragmentos de conversas fechadas são cacheados
+    def test_closed_conversation_fragment_cached(self):
+        self.conversation.status = Conversation.Status.CLOSED
+        self.conversation.save()
+
+        first = self.client.get(self.fragment_url)
+        with self.assertNumQueries(1):
+            second = self.client.get(self.fragment_url)
+        self.assertEqual(first.content, second.content)
+
+    # Teste 5: Cursores que não apontam para mensagens não ocupam o cache
+    def test_unknown_cursor_not_cached(self):
+        self.conversation.status = Conversation.Status.CLOSED
+        self.conversation.save()
+        bogus_id = uuid.uuid4()
+
+        response = self.client.get(self.fragment_url, {
+            "before": "2025-02-21T10:00:30",
+            "before_id": str(bogus_id)
+        })
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(cache.get(f"chat:messages:{self.conversation.id}:{bogus_id}"))
+
+    # Teste 6: Cursor válido é normalizado pela mensagem
+    def test_cursor_normalized_by_message(self):
+        self.conversation.status = Conversation.Status.CLOSED
+        self.conversation.save()
+        cursor = Message.objects.get(content="Mensagem 10")
+
+        exact = self.client.get(self.fragment_url, {
+            "before": cursor.timestamp.isoformat(),
+            "before_id": str(cursor.id)
+        })
+        with self.assertNumQueries(1):
+            other_timestamp = self.client.get(self.fragment_url, {
+                "before": "2030-01-01T00:00:00",
+                "before_id": str(cursor.id)
+            })
+        self.assertEqual(exact.content, other_timestamp.content)
+        self.assertNotContains(exact, "Mensagem 10<")
+
+
+class ConversationStateIndexTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.webhook_url = reverse('webhook')
+        conversation_states.clear()
+        self.conversation = Conversation.objects.create(
+            id=uuid.uuid4(),
+            status=Conversation.Status.OPEN,
+            created_at=datetime.fromisoformat("2025-02-21T10:20:41.349308")
+        )
+
+    def post_message(self):
+        message_id = uuid.uuid4()
+        response = self.client.post(self.webhook_url, {
+            "type": "NEW_MESSAGE",
+            "timestamp": "2025-02-21T10:20:42.349308",
+            "data": {
+                "id": str(message_id),
+                "direction": "RECEIVED",
+                "content": "Olá, tudo bem?",
+                "conversation_id": str(self.conversation.id)
+            }
+        }, format='json')
+        return response, message_id
+
+    # Teste 1: Índice com LRU limitado
+    def test_lru_eviction(self):
+        index = ConversationStateIndex(max_size=2)
+        first, second, third = (uuid.uuid4() for _ in range(3))
+        for conversation_id in (first, second):
+            index.put(ConversationState(conversation_id, Conversation.Status.OPEN, None))
+
+        index.get(first)
+        index.put(ConversationState(third, Conversation.Status.OPEN, None))
+
+        self.assertIsNotNone(index.get(first))
+        self.assertIsNone(index.get(second))
+        self.assertEqual(len(index), 2)
+
+    # Teste 2: Mensagem em conversa conhecida não lê a tabela de conversas
+    def test_message_insert_skips_conversation_read(self):
+        with CaptureQueriesContext(connection) as queries:
+            response, message_id = self.post_message()
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(Message.objects.filter(id=message_id).exists())
+        conversation_reads = [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith('SELECT') and 'FROM "chat_conversation"' in query['sql']
+        ]
+        self.assertEqual(conversation_reads, [])
+
+    # Teste 3: Conversa fechada por outro worker não aceita mensagens
+    def test_stale_entry_closed_elsewhere(self):
+        self.assertFalse(conversation_states.get(self.conversation.id).is_closed)
+        # update() não dispara sinais, simulando o fechamento em outro processo
+        Conversation.objects.filter(id=self.conversation.id).update(status=Conversation.Status.CLOSED)
+
+        response, message_id = self.post_message()
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Message.objects.filter(id=message_id).exists())
+        self.assertTrue(conversation_states.get(self.conversation.id).is_closed)
+
+    # Teste 4: Miss no índice consulta o banco
+    def test_miss_falls_back_to_database(self):
+        conversation_states.clear()
+        response, message_id = self.post_message()
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertIsNotNone(conversation_states.get(self.conversation.id))
+
+    # Teste 5: Aquecimento a partir do banco carrega apenas conversas abertas
+    def test_warm(self):
+        closed = Conversation.objects.create(
+            id=uuid.uuid4(),
+            status=Conversation.Status.CLOSED,
+            created_at=datetime.fromisoformat("2025-02-21T10:20:41.349308")
+        )
+        conversation_states.clear()
+        conversation_states.warm()
+        self.assertEqual(conversation_states.get(self.conversation.id).status, Conversation.Status.OPEN)
+        self.assertIsNone(conversation_states.get(closed.id))
+
+    # Teste 6: Requisições não aquecem o índice
+    def test_request_does_not_warm(self):
+        conversation_states.clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('health'))
+        self.assertEqual(queries.captured_queries, [])
+        self.assertEqual(len(conversation_states), 0)
+
+
+# Imports the WSGI module in a fresh interpreter, then sends one webhook
+STARTUP_PROBE = """
+import json, sys
+import realmate_challenge.wsgi as wsgi
+from django.db import connection, reset_queries
+from django.template import engines
+from chat.benchmark import call_wsgi, new_message_body, wsgi_environ
+from chat.state import conversation_states
+
+result = {
+    'index': len(conversation_states),
+    'templates': len(engines['django'].engine.template_loaders[0].get_template_cache),
+    'connected': connection.connection is not None,
+}
+
+reset_queries()
+environ = wsgi_environ('POST', '/webhook/', new_message_body(sys.argv[1]))
+result['status'], _ = call_wsgi(wsgi.application, environ)
+result['conversation_reads'] = [
+    query['sql'] for query in connection.queries
+    if query['sql'].startswith('SELECT') and 'chat_conversation' in query['sql']
+]
+print(json.dumps(result))
+"""
+
+
+class WarmUpTests(TestCase):
+    # Teste 1: Inicialização real (ChatConfig.ready + wsgi) aquece tudo antes da primeira requisição
+    def test_startup_through_chat_config_ready(self):
+        with temporary_database(DJANGO_WARMUP='on') as env:
+            conversation_id = create_conversation(env)
+            result = run_script(env, STARTUP_PROBE, conversation_id)
+
+        self.assertEqual(result['index'], 1)
+        self.assertGreater(result['templates'], 0)
+        self.assertTrue(result['connected'])
+        self.assertEqual(result['status'], 201)
+        self.assertEqual(result['conversation_reads'], [])
+
+    # Teste 2: Modo preload não usa o banco
+    @override_settings(CHAT_WARMUP='preload')
+    def test_preload_skips_database(self):
+        with self.assertNumQueries(0):
+            timings = warm_up_on_ready()
+        self.assertNotIn('database', timings)
+
+    # Teste 3: Desligado por padrão
+    @override_settings(CHAT_WARMUP='off')
+    def test_disabled(self):
+        self.assertIsNone(warm_up_on_ready())
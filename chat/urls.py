@@ -1,13 +1,16 @@
 from django.urls import path
-from .views import WebhookView, ConversationDetailView
-from .views_front import ConversationListView, FrontConversationDetailView
+from .views import WebhookView, ConversationDetailView, MetricsView, AdmissionStatsView
+from .views_front import ConversationListView, FrontConversationDetailView, ConversationMessagesFragmentView
 
 urlpatterns = [
     # Frontend
     path('', ConversationListView.as_view(), name='conversation-list'),
     path('conversations/<uuid:id>/', FrontConversationDetailView.as_view(), name='conversation-detail'),
+    path('conversations/<uuid:id>/messages/', ConversationMessagesFragmentView.as_view(), name='conversation-messages'),
 
     # API
     path('webhook/', WebhookView.as_view(), name='webhook'),
     path('webhook/conversations/<uuid:id>/', ConversationDetailView.as_view(), name='api-conversation-detail'),
+    path('webhook/metrics/', MetricsView.as_view(), name='api-metrics'),
+    path('webhook/admission/', AdmissionStatsView.as_view(), name='api-admission-stats'),
 ]
\ No newline at end of file
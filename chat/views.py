@@ -4,10 +4,15 @@ from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.generics import RetrieveAPIView
+from django.utils import timezone
 from django.utils.dateparse import parse_datetime
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
 from .models import Conversation, Message
-from .serializers import ConversationSerializer
+from .serializers import ConversationSerializer, MetricsRollupSerializer
+from .state import conversation_states, insert_message
+from .middleware import admission_stats
+from . import metrics
+from datetime import timedelta
 import uuid
 import logging
 
@@ -61,11 +66,13 @@ class WebhookView(APIView):
             )
 
         try:
-            Conversation.objects.create(
-                id=conv_uuid,
-                status=Conversation.Status.OPEN,
-                created_at=timestamp
-            )
+            with transaction.atomic():
+                Conversation.objects.create(
+                    id=conv_uuid,
+                    status=Conversation.Status.OPEN,
+                    created_at=timestamp
+                )
+                metrics.record_conversation_opened(timestamp)
             return Response(
                 {"status": "Conversation created"},
                 status=status.HTTP_201_CREATED
@@ -92,44 +99,67 @@ class WebhookView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        if data['direction'] not in Message.Direction.values:
+        try:
+            message_uuid = uuid.UUID(data['id'])
+        except ValueError:
             return Response(
-                {"error": f"Invalid direction. Valid values: {', '.join(Message.Direction.values)}"},
+                {"error": "Invalid message ID"},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        try:
-            conversation = Conversation.objects.get(id=conv_uuid)
-
-            if conversation.status == Conversation.Status.CLOSED:
-                return Response(
-                    {"error": "Cannot add messages to closed conversation"},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-
-            Message.objects.create(
-                id=uuid.UUID(data['id']),
-                conversation=conversation,
-                direction=data['direction'],
-                content=data['content'],
-                timestamp=timestamp
-            )
+        if data['direction'] not in Message.Direction.values:
             return Response(
-                {"status": "Message created"},
-                status=status.HTTP_201_CREATED
+                {"error": f"Invalid direction. Valid values: {', '.join(Message.Direction.values)}"},
+                status=status.HTTP_400_BAD_REQUEST
             )
 
-        except Conversation.DoesNotExist:
+        conversation = conversation_states.load(conv_uuid)
+        if conversation is None:
             return Response(
                 {"error": "Conversation not found"},
                 status=status.HTTP_404_NOT_FOUND
             )
+
+        if conversation.is_closed:
+            return Response(
+                {"error": "Cannot add messages to closed conversation"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            with transaction.atomic():
+                inserted = insert_message(
+                    id=message_uuid,
+                    conversation_id=conv_uuid,
+                    direction=data['direction'],
+                    content=data['content'],
+                    timestamp=timestamp
+                )
+                if inserted:
+                    metrics.record_message(conversation, data['direction'], timestamp)
         except IntegrityError:
             return Response(
                 {"error": "Message ID already exists"},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+        if not inserted:
+            # The cached entry was stale: another worker closed or removed it
+            if conversation_states.refresh(conv_uuid) is None:
+                return Response(
+                    {"error": "Conversation not found"},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            return Response(
+                {"error": "Cannot add messages to closed conversation"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response(
+            {"status": "Message created"},
+            status=status.HTTP_201_CREATED
+        )
+
     def handle_close_conversation(self, data, timestamp):
         conversation_id = data.get('id')
         if not conversation_id:
@@ -140,32 +170,49 @@ class WebhookView(APIView):
 
         try:
             conv_uuid = uuid.UUID(conversation_id)
-            conversation = Conversation.objects.get(id=conv_uuid)
-
-            if conversation.status == Conversation.Status.CLOSED:
-                return Response(
-                    {"warning": "Conversation already closed"},
-                    status=status.HTTP_200_OK
-                )
+        except ValueError:
+            return Response(
+                {"error": "Invalid conversation ID"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-            conversation.status = Conversation.Status.CLOSED
-            conversation.save()
+        conversation = conversation_states.get(conv_uuid)
+        if conversation is not None and conversation.is_closed:
             return Response(
-                {"status": "Conversation closed"},
+                {"warning": "Conversation already closed"},
                 status=status.HTTP_200_OK
             )
 
-        except ValueError:
-            return Response(
-                {"error": "Invalid conversation ID"},
-                status=status.HTTP_400_BAD_REQUEST
+        with transaction.atomic():
+            closed = Conversation.objects.filter(
+                id=conv_uuid,
+                status=Conversation.Status.OPEN
+            ).update(
+                status=Conversation.Status.CLOSED,
+                closed_at=timestamp,
+                updated_at=timezone.now()
             )
-        except Conversation.DoesNotExist:
+            if closed:
+                metrics.record_conversation_closed(timestamp)
+
+        if not closed:
+            if conversation_states.refresh(conv_uuid) is None:
+                return Response(
+                    {"error": "Conversation not found"},
+                    status=status.HTTP_404_NOT_FOUND
+                )
             return Response(
-                {"error": "Conversation not found"},
-                status=status.HTTP_404_NOT_FOUND
+                {"warning": "Conversation already closed"},
+                status=status.HTTP_200_OK
             )
 
+        if conversation is not None:
+            conversation.status = Conversation.Status.CLOSED
+        return Response(
+            {"status": "Conversation closed"},
+            status=status.HTTP_200_OK
+        )
+
 
 class ConversationDetailView(RetrieveAPIView):
     serializer_class = ConversationSerializer
@@ -179,4 +226,63 @@ class ConversationDetailView(RetrieveAPIView):
                 id=self.kwargs['id']
             )
         except (ValueError, Conversation.DoesNotExist):
-            raise Http404("Conversation not found")
\ No newline at end of file
+            raise Http404("Conversation not found")
+
+
+class MetricsView(APIView):
+    default_windows = {
+        'hour': timedelta(hours=24),
+        'day': timedelta(days=30),
+    }
+
+    def get(self, request):
+        granularity = request.query_params.get('granularity', 'hour')
+        if granularity not in metrics.ROLLUP_MODELS:
+            return Response(
+                {"error": f"Invalid granularity. Valid values: {', '.join(metrics.ROLLUP_MODELS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            end = self._parse_bound(request.query_params.get('end')) or timezone.now()
+            start = (
+                self._parse_bound(request.query_params.get('start'))
+                or end - self.default_windows[granularity]
+            )
+        except ValueError:
+            return Response(
+                {"error": "Invalid start/end format. Use ISO 8601"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        rows, totals = metrics.summarize(granularity, start, end)
+        return Response({
+            "granularity": granularity,
+            "start": start,
+            "end": end,
+            "totals": MetricsRollupSerializer(totals).data,
+            "buckets": MetricsRollupSerializer(rows, many=True).data,
+        })
+
+    @staticmethod
+    def _parse_bound(value):
+        if not value:
+            return None
+        parsed = parse_datetime(value)
+        if not parsed:
+            raise ValueError(value)
+        if timezone.is_aware(parsed):
+            # Rollup buckets are stored as naive datetimes in TIME_ZONE
+            parsed = timezone.make_naive(parsed, timezone.get_default_timezone())
+        return parsed
+
+
+class AdmissionStatsView(APIView):
+    def get(self, request):
+        stats = admission_stats()
+        if stats is None:
+            return Response(
+                {"error": "Admission control is not enabled"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(stats)
@@ -1,5 +1,63 @@
+from django.core.cache import cache
+from django.db.models import Q
+from django.http import HttpResponse, HttpResponseBadRequest
+from django.shortcuts import get_object_or_404
+from django.template.loader import render_to_string
+from django.utils.dateparse import parse_datetime
+from django.views import View
 from django.views.generic import ListView, DetailView
 from .models import Conversation
+import uuid
+
+MESSAGE_PAGE_SIZE = 50
+FRAGMENT_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def render_message_page(conversation, before=None):
+    """
+    Render the MESSAGE_PAGE_SIZE messages preceding `before` as an HTML fragment.
+
+    `before` is a (timestamp, id) keyset cursor; None means the most recent
+    page. Closed conversations never change, so their fragments are cached,
+    keyed by the cursor message. Cursors that do not point to a message of
+    the conversation are rendered but never cached.
+    """
+    cache_key = None
+    if conversation.status == Conversation.Status.CLOSED:
+        cache_key = f"chat:messages:{conversation.id}:{before[1] if before else 'latest'}"
+        html = cache.get(cache_key)
+        if html is not None:
+            return html
+        if before:
+            timestamp = (
+                conversation.messages.filter(id=before[1])
+                .values_list('timestamp', flat=True)
+                .first()
+            )
+            if timestamp is None:
+                cache_key = None
+            else:
+                before = (timestamp, before[1])
+
+    messages = conversation.messages.order_by('-timestamp', '-id')
+    if before:
+        timestamp, message_id = before
+        messages = messages.filter(
+            Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, id__lt=message_id)
+        )
+    page = list(messages[:MESSAGE_PAGE_SIZE + 1])
+    has_more = len(page) > MESSAGE_PAGE_SIZE
+    page = page[:MESSAGE_PAGE_SIZE][::-1]
+
+    html = render_to_string('chat/message_page.html', {
+        'conversation': conversation,
+        'page_messages': page,
+        'next_cursor': page[0] if has_more else None,
+    })
+    if cache_key:
+        cache.set(cache_key, html, FRAGMENT_CACHE_TIMEOUT)
+    return html
+
 
 class ConversationListView(ListView):
     model = Conversation
@@ -12,4 +70,26 @@ class FrontConversationDetailView(DetailView):
     template_name = 'chat/conversation_detail.html'
     context_object_name = 'conversation'
     slug_field = 'id'
-    slug_url_kwarg = 'id'
\ No newline at end of file
+    slug_url_kwarg = 'id'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['messages_html'] = render_message_page(self.object)
+        return context
+
+class ConversationMessagesFragmentView(View):
+    def get(self, request, id):
+        conversation = get_object_or_404(Conversation, id=id)
+
+        before = None
+        if 'before' in request.GET or 'before_id' in request.GET:
+            try:
+                timestamp = parse_datetime(request.GET.get('before', ''))
+                message_id = uuid.UUID(request.GET.get('before_id', ''))
+                if not timestamp:
+                    raise ValueError
+            except ValueError:
+                return HttpResponseBadRequest("Invalid cursor")
+            before = (timestamp, message_id)
+
+        return HttpResponse(render_message_page(conversation, before))
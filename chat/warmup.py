@@ -0,0 +1,104 @@
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.template.loader import get_template
+from django.urls import get_resolver
+from pathlib import Path
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _timed(timings, name, step):
+    started = time.perf_counter()
+    step()
+    timings[name] = (time.perf_counter() - started) * 1000
+
+
+def connect_databases():
+    """Open (and run the init commands of) every configured database connection."""
+    for connection in connections.all():
+        connection.ensure_connection()
+
+
+def compile_templates():
+    """Load every chat template so the cached loader holds the compiled versions."""
+    template_dir = Path(__file__).resolve().parent / 'templates'
+    for path in sorted(template_dir.rglob('*.html')):
+        get_template(path.relative_to(template_dir).as_posix())
+
+
+def prime_code_paths():
+    """Import and build what the first webhook and page requests would otherwise pay for."""
+    from rest_framework.parsers import JSONParser
+    from rest_framework.renderers import JSONRenderer
+    from .serializers import ConversationSerializer, MetricsRollupSerializer
+    from . import views, views_front  # noqa: F401
+
+    get_resolver().url_patterns
+    JSONParser(), JSONRenderer()
+    ConversationSerializer().fields
+    MetricsRollupSerializer().fields
+
+
+def warm_up(database=True):
+    """
+    Do the work a fresh worker would otherwise do lazily on its first requests.
+
+    With `database=False` only process-wide state is prepared, which is what
+    a master process should do before forking (`gunicorn --preload`):
+    database connections must not be shared with forked workers, so each
+    worker calls `post_fork` to open its own. Returns the time spent per
+    step in milliseconds.
+
+    Nothing here runs queries: this is called from `ChatConfig.ready`,
+    where Django discourages them. Query-based warm-up lives in
+    `warm_up_application`.
+    """
+    timings = {}
+    _timed(timings, 'templates', compile_templates)
+    _timed(timings, 'code_paths', prime_code_paths)
+    if database:
+        try:
+            _timed(timings, 'database', connect_databases)
+        except DatabaseError:
+            logger.exception("Database warm-up failed; connections will open lazily")
+    else:
+        connections.close_all()
+
+    logger.info(
+        "Warm-up finished: %s",
+        ", ".join(f"{name}={elapsed:.1f}ms" for name, elapsed in timings.items())
+    )
+    return timings
+
+
+def post_fork(server=None, worker=None):
+    """Gunicorn `post_fork` hook: open this worker's connections after a preload."""
+    warm_up(database=True)
+
+
+def warm_up_on_ready():
+    mode = getattr(settings, 'CHAT_WARMUP', 'off')
+    if mode == 'off':
+        return None
+    return warm_up(database=(mode != 'preload'))
+
+
+def warm_up_application():
+    """
+    Warm-up that needs ready apps, run by the WSGI/ASGI modules after the
+    application is built and before any request is served.
+
+    The conversation state index is always warmed. In 'preload' mode this
+    runs in the master, so the loaded index is inherited by forked workers
+    and the connection used to load it is closed before forking.
+    """
+    from .state import warm_conversation_states
+
+    started = time.perf_counter()
+    warm_conversation_states()
+    logger.info("Conversation state index warmed in %.1fms", (time.perf_counter() - started) * 1000)
+
+    if getattr(settings, 'CHAT_WARMUP', 'off') == 'preload':
+        connections.close_all()
@@ -14,3 +14,9 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'realmate_challenge.settings')
 
 application = get_asgi_application()
+
+# Apps are ready here, so query-based warm-up runs before the first
+# request instead of while serving it
+from chat.warmup import warm_up_application  # noqa: E402
+
+warm_up_application()
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
 from pathlib import Path
+import os
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -31,7 +32,8 @@ ALLOWED_HOSTS = []
 # Application definition
 
 INSTALLED_APPS = [
-    'django.contrib.admin',
+    # Admin modules are discovered when the URLconf loads, not at startup
+    'django.contrib.admin.apps.SimpleAdminConfig',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
@@ -43,6 +45,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'chat.middleware.AdmissionControlMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -51,14 +54,39 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Admission control for the webhook endpoint (see chat/middleware.py)
+
+WEBHOOK_ADMISSION = {
+    'MAX_CONCURRENT': 4,
+    'MAX_QUEUE_WAIT': 0.5,
+    'RATE': 50,
+    'BURST': 100,
+    'PRIORITY_MAX_CONCURRENT': 16,
+}
+
+# Conversations kept in each worker's in-memory state index (see chat/state.py)
+
+CONVERSATION_STATE_INDEX_SIZE = 100000
+
+# Startup warm-up run from ChatConfig.ready (see chat/warmup.py):
+# 'off', 'on' (templates, code paths and database) or 'preload' (no database,
+# for servers that import the app before forking workers)
+
+CHAT_WARMUP = os.environ.get('DJANGO_WARMUP', 'off')
+
 ROOT_URLCONF = 'realmate_challenge.urls'
 
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -78,7 +106,17 @@ WSGI_APPLICATION = 'realmate_challenge.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.environ.get('DJANGO_DB_NAME', BASE_DIR / 'db.sqlite3'),
+        # Keep the connection opened by the warm-up instead of reconnecting per request
+        'CONN_MAX_AGE': 60,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'init_command': 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL',
+            # Seconds to wait on the SQLite write lock. Webhooks use a shorter
+            # wait (MAX_QUEUE_WAIT, set by AdmissionControlMiddleware) and are
+            # shed with 503 past it; migrate and rebuild_metrics keep this one
+            'timeout': 20,
+        },
     }
 }
 
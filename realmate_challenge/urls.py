@@ -21,6 +21,8 @@ from django.http import HttpResponse
 def health(request):
     return HttpResponse("OK")
 
+admin.autodiscover()
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('health/', health, name='health'),